@@ -6,112 +6,279 @@ A tool to compare JSON request and response bodies in a table format
 for easy data validation and verification.
 """
 
+import functools
 import json
+import re
 import sys
-from typing import Dict, Any, List, Tuple
-from tabulate import tabulate
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Tuple
 from collections import OrderedDict
 
 # For colored output
 try:
     from colorama import init, Fore, Back, Style
     init(autoreset=True)  # Initialize colorama
-    COLOR_SUPPORT = True
+    # Only emit color codes when output goes to a terminal
+    COLOR_SUPPORT = sys.stdout is not None and sys.stdout.isatty()
 except ImportError:
     COLOR_SUPPORT = False
 
+# Colored renderings of the fixed set of row statuses
+if COLOR_SUPPORT:
+    _COLORED_STATUS = {
+        "✅ MATCH": f"{Fore.GREEN}✅ MATCH{Style.RESET_ALL}",
+        "🔄 DIFFERENT VALUES": f"{Fore.YELLOW}{Back.BLACK}🔄 DIFFERENT VALUES{Style.RESET_ALL}",
+        "❌ MISSING IN REQUEST": f"{Fore.RED}{Back.BLACK}❌ MISSING IN REQUEST{Style.RESET_ALL}",
+        "❌ MISSING IN RESPONSE": f"{Fore.RED}{Back.BLACK}❌ MISSING IN RESPONSE{Style.RESET_ALL}",
+    }
+else:
+    _COLORED_STATUS = {}
+
+# For faster parsing of large documents
+try:
+    import orjson
+    _fast_loads = orjson.loads
+except ImportError:
+    _fast_loads = None
+
+# orjson turns integers outside the 64-bit range into floats, losing precision;
+# any run of 19+ digits may be such an integer, so those inputs use json.loads
+_LONG_DIGIT_RUN = re.compile(r'\d{19}')
+
+# Types whose equal values always have the same str(); floats are excluded
+# because -0.0 == 0.0
+_PRINTED_BY_VALUE = frozenset((str, int, bool, type(None)))
+
+# ANSI color sequences, which take no space when a table is displayed
+_ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+# Request and response are parsed in parallel only on free-threaded builds
+# (with the GIL the two parses cannot overlap) and only when their combined
+# size is large enough to pay for starting a thread pool
+_PARALLEL_PARSE = hasattr(sys, "_is_gil_enabled") and not sys._is_gil_enabled()
+_PARALLEL_PARSE_MIN_CHARS = 1_000_000
+
+
+def _strip_indices(field_path: str) -> str:
+    """Remove every "[<digits>]" array index group from a field path"""
+    start = field_path.find('[')
+    if start == -1:
+        return field_path
+    
+    chunks = []
+    kept_from = 0
+    while start != -1:
+        end = field_path.find(']', start + 1)
+        if end == -1:
+            break
+        if field_path[start + 1:end].isdecimal():
+            chunks.append(field_path[kept_from:start])
+            kept_from = end + 1
+            start = field_path.find('[', kept_from)
+        else:
+            start = field_path.find('[', start + 1)
+    chunks.append(field_path[kept_from:])
+    return ''.join(chunks)
+
+
+def _display_width(text: str) -> int:
+    """Number of terminal columns text occupies, ignoring ANSI color codes"""
+    if '\x1b' in text:
+        text = _ANSI_ESCAPE.sub('', text)
+    if text.isascii():
+        return len(text)
+    width = 0
+    for char in text:
+        if unicodedata.combining(char):
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+    return width
+
+
+def _render_grid(headers: List[str], rows: List[List[str]]) -> str:
+    """
+    Render a left-aligned grid table, laid out like tabulate's "grid" format
+    (cells may contain newlines and ANSI color codes)
+    """
+    table = [[str(cell).split('\n') for cell in row] for row in [headers, *rows]]
+    
+    # Column widths in one pass; headers get two extra characters of room
+    widths = [len(header) + 2 for header in headers]
+    for row in table:
+        for i, lines in enumerate(row):
+            for line in lines:
+                width = _display_width(line)
+                if width > widths[i]:
+                    widths[i] = width
+    
+    def border(fill: str) -> str:
+        return '+' + '+'.join(fill * (width + 2) for width in widths) + '+'
+    
+    def row_lines(row: List[List[str]]) -> List[str]:
+        height = max(len(lines) for lines in row)
+        out = []
+        for n in range(height):
+            cells = []
+            for lines, width in zip(row, widths):
+                line = lines[n] if n < len(lines) else ''
+                cells.append(line + ' ' * (width - _display_width(line)))
+            out.append('| ' + ' | '.join(cells) + ' |')
+        return out
+    
+    separator = border('-')
+    output = [separator, *row_lines(table[0]), border('=')]
+    for row in table[1:]:
+        output.extend(row_lines(row))
+        output.append(separator)
+    return '\n'.join(output)
+
+
+# Path component marker for list items while walking a JSON structure
+_ARRAY_INDEX = object()
+
+# Stack marker for leaving a container once all of its children are walked
+_LEAVE_CONTAINER = object()
+
+
+def _is_plain_key(key: Any) -> bool:
+    """
+    Whether a dict key can be used as a path component when deriving leaf
+    names directly (a non-empty string without separators or brackets)
+    """
+    return (type(key) is str and key != ''
+            and '.' not in key and '[' not in key and ']' not in key)
+
+
+def _truncate(value: Any, max_length: int = 50) -> str:
+    """Render a value for table display, cut to max_length characters"""
+    text = str(value)
+    return text[:max_length] + "..." if len(text) > max_length else text
+
+
+@functools.lru_cache(maxsize=4096)
+def get_leaf_name(field_path: str) -> str:
+    """
+    Extract the leaf component name from a field path with immediate parent context
+    Examples:
+    - "TxnDate" -> "TxnDate"
+    - "Invoice.TxnDate" -> "Invoice.TxnDate"
+    - "Customer.Invoice.TxnDate" -> "Invoice.TxnDate" (skip first parent)
+    - "Customer.Address.Street" -> "Address.Street"
+    - "items[0].name" -> "name"
+    - "tags[0]" -> "tags_item"
+    Leaf names are interned, since the same few names repeat across array elements
+    """
+    # Handle array items specially
+    if field_path.endswith(']'):
+        bracket = field_path.rfind('[')
+        if bracket != -1 and field_path[bracket + 1:-1].isdecimal():
+            # This is an array item, get the array name
+            array_name = field_path[:bracket].rsplit('.', 1)[-1]
+            return sys.intern(f"{array_name}_item") if array_name else "array_item"
+
+    # Remove array indices from middle of path
+    clean_path = _strip_indices(field_path)
+
+    # Get field name with immediate parent (skip first parent)
+    parts = clean_path.rsplit('.', 2)
+    if len(parts) == 3:
+        # Skip first parent, return immediate parent + field name
+        return sys.intern(f"{parts[1]}.{parts[2]}")
+    return sys.intern(clean_path)
+
 
 class JSONComparator:
-    def __init__(self):
-        self.differences = []
-        self.matches = []
-        self.all_fields = set()
+    # Kept as a method for existing callers; the cache is shared by all instances
+    get_leaf_name = staticmethod(get_leaf_name)
     
     def colorize_status(self, status: str) -> str:
         """Apply color formatting to status messages"""
-        if not COLOR_SUPPORT:
-            return status
-        
-        if "✅ MATCH" in status:
-            return f"{Fore.GREEN}{status}{Style.RESET_ALL}"
-        elif "🔄 DIFFERENT VALUES" in status:
-            return f"{Fore.YELLOW}{Back.BLACK}{status}{Style.RESET_ALL}"
-        elif "❌ MISSING" in status:
-            return f"{Fore.RED}{Back.BLACK}{status}{Style.RESET_ALL}"
-        else:
-            return status
-    
-    def flatten_json(self, data: Dict[Any, Any], parent_key: str = '', sep: str = '.') -> Dict[str, Any]:
-        """
-        Flatten nested JSON structure into dot-notation keys
-        """
-        items = []
-        if isinstance(data, dict):
-            for k, v in data.items():
-                new_key = f"{parent_key}{sep}{k}" if parent_key else k
-                if isinstance(v, (dict, list)):
-                    items.extend(self.flatten_json(v, new_key, sep=sep).items())
-                else:
-                    items.append((new_key, v))
-        elif isinstance(data, list):
-            for i, v in enumerate(data):
-                new_key = f"{parent_key}{sep}[{i}]" if parent_key else f"[{i}]"
-                if isinstance(v, (dict, list)):
-                    items.extend(self.flatten_json(v, new_key, sep=sep).items())
-                else:
-                    items.append((new_key, v))
-        return dict(items)
+        return _COLORED_STATUS.get(status, status)
     
-    def get_leaf_name(self, field_path: str) -> str:
+    def _walk(self, data: Any,
+              single_by_leaf: Dict[str, Tuple[str, Any]],
+              multi_by_leaf: Dict[str, List[Tuple[str, Any]]]) -> None:
         """
-        Extract the leaf component name from a field path with immediate parent context
-        Examples:
-        - "TxnDate" -> "TxnDate"
-        - "Invoice.TxnDate" -> "Invoice.TxnDate"
-        - "Customer.Invoice.TxnDate" -> "Invoice.TxnDate" (skip first parent)
-        - "Customer.Address.Street" -> "Address.Street"
-        - "items[0].name" -> "name"
-        - "tags[0]" -> "tags_item"
+        Walk a nested JSON structure depth-first and group its leaf values
+        by leaf name as (dot-notation path, value) pairs.
+        single_by_leaf holds the first occurrence of every leaf name;
+        multi_by_leaf holds all occurrences, only for names seen more than once
         """
-        # Handle array items specially
-        import re
-        if re.search(r'\[\d+\]$', field_path):
-            # This is an array item, get the array name
-            clean_path = re.sub(r'\[\d+\]$', '', field_path)
-            if '.' in clean_path:
-                array_name = clean_path.split('.')[-1]
-            else:
-                array_name = clean_path
-            return f"{array_name}_item" if array_name else "array_item"
+        if not isinstance(data, (dict, list)):
+            return
         
-        # Remove array indices from middle of path
-        clean_path = re.sub(r'\[\d+\]', '', field_path)
-        
-        # Get field name with immediate parent (skip first parent)
-        if '.' in clean_path:
-            parts = clean_path.split('.')
-            if len(parts) >= 3:
-                # Skip first parent, return immediate parent + field name
-                return '.'.join(parts[-2:])
-            elif len(parts) == 2:
-                # Return parent + field name
-                return '.'.join(parts)
+        # Stack entries are (path, parent component, own component, node), where a
+        # component is a dict key, _ARRAY_INDEX for list items or None for the root.
+        # Children are pushed in reverse so they pop in document order.
+        # Caller-built objects can contain themselves, so the ids of the
+        # containers on the current path are tracked to detect cycles
+        stack = [('', None, None, data)]
+        on_path = set()
+        while stack:
+            parent_key, parent_name, name, node = stack.pop()
+            if name is _LEAVE_CONTAINER:
+                on_path.discard(id(node))
+                continue
+            if isinstance(node, (dict, list)):
+                if id(node) in on_path:
+                    raise ValueError(f"circular reference detected at '{parent_key}'")
+                on_path.add(id(node))
+                stack.append(('', None, _LEAVE_CONTAINER, node))
+            if isinstance(node, dict):
+                children = [(f"{parent_key}.{k}" if parent_key else f"{k}", name, k, v) for k, v in node.items()]
+                stack.extend(reversed(children))
+            elif isinstance(node, list):
+                children = [(f"{parent_key}.[{i}]" if parent_key else f"[{i}]", name, _ARRAY_INDEX, v) for i, v in enumerate(node)]
+                stack.extend(reversed(children))
             else:
-                return parts[0]
-        return clean_path
+                # Build the leaf name from the last two components, giving the
+                # same result as get_leaf_name(parent_key) without re-parsing it
+                if name is _ARRAY_INDEX:
+                    leaf_name = "array_item"
+                elif not _is_plain_key(name):
+                    leaf_name = get_leaf_name(parent_key)
+                elif parent_name is None:
+                    leaf_name = sys.intern(name)
+                elif parent_name is _ARRAY_INDEX:
+                    leaf_name = sys.intern(f".{name}")
+                elif _is_plain_key(parent_name):
+                    leaf_name = sys.intern(f"{parent_name}.{name}")
+                else:
+                    # Keys with separators or brackets need the full path parse
+                    leaf_name = get_leaf_name(parent_key)
+                item = (parent_key, node)
+                first = single_by_leaf.setdefault(leaf_name, item)
+                if first is not item:
+                    items = multi_by_leaf.get(leaf_name)
+                    if items is None:
+                        multi_by_leaf[leaf_name] = [first, item]
+                    else:
+                        items.append(item)
     
     def parse_json_with_line_info(self, json_string: str, label: str = "JSON"):
         """Parse JSON and provide detailed error information with line numbers"""
+        if _fast_loads is not None and not _LONG_DIGIT_RUN.search(json_string):
+            try:
+                return _fast_loads(json_string)
+            except ValueError:
+                # Let the stdlib parser decide: it accepts a few inputs orjson
+                # rejects (NaN, Infinity) and reports error positions
+                pass
+        
         try:
             return json.loads(json_string)
         except json.JSONDecodeError as e:
             # Get line and column information
-            line_num = e.lineno if hasattr(e, 'lineno') else 1
-            col_num = e.colno if hasattr(e, 'colno') else 1
+            line_num = e.lineno
+            col_num = e.colno
             
             # Get the problematic line
             lines = json_string.split('\n')
-            error_line = lines[line_num - 1] if line_num <= len(lines) else ""
+            try:
+                error_line = lines[line_num - 1]
+            except IndexError:
+                error_line = ""
             
             # Create visual pointer to error location
             pointer = ' ' * (col_num - 1) + '^'
@@ -142,104 +309,108 @@ Original Error: {str(e)}
             
             raise ValueError(error_msg)
 
-    def compare_json(self, request_json: str, response_json: str) -> List[List[str]]:
+    def compare_json(self, request_json: str, response_json: str) -> Tuple[List[List[str]], List[str], List[str]]:
         """
         Compare two JSON strings and return comparison data for table display
         Compares only leaf field names, ignoring parent hierarchy
+        Returns (table rows, matching leaf names, different/missing leaf names)
         """
         try:
             # Parse JSON strings with detailed error reporting
-            request_data = self.parse_json_with_line_info(request_json, "REQUEST")
-            response_data = self.parse_json_with_line_info(response_json, "RESPONSE")
-            
-            # Flatten both JSON structures
-            flat_request = self.flatten_json(request_data)
-            flat_response = self.flatten_json(response_data)
-            
-            # Group fields by their leaf names
-            request_by_leaf = {}
-            response_by_leaf = {}
-            
-            for full_path, value in flat_request.items():
-                leaf_name = self.get_leaf_name(full_path)
-                if leaf_name not in request_by_leaf:
-                    request_by_leaf[leaf_name] = []
-                request_by_leaf[leaf_name].append((full_path, value))
-            
-            for full_path, value in flat_response.items():
-                leaf_name = self.get_leaf_name(full_path)
-                if leaf_name not in response_by_leaf:
-                    response_by_leaf[leaf_name] = []
-                response_by_leaf[leaf_name].append((full_path, value))
+            if _PARALLEL_PARSE and len(request_json) + len(response_json) >= _PARALLEL_PARSE_MIN_CHARS:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    request_future = executor.submit(self.parse_json_with_line_info, request_json, "REQUEST")
+                    response_future = executor.submit(self.parse_json_with_line_info, response_json, "RESPONSE")
+                    # result() re-raises the ValueError of a failed parse, request first
+                    request_data = request_future.result()
+                    response_data = response_future.result()
+            else:
+                request_data = self.parse_json_with_line_info(request_json, "REQUEST")
+                response_data = self.parse_json_with_line_info(response_json, "RESPONSE")
+        except ValueError as e:
+            # Re-raise ValueError (from parse_json_with_line_info) as-is
+            raise e
+        except Exception as e:
+            raise ValueError(f"Unexpected error during comparison: {e}")
+        
+        return self._compare_objects(request_data, response_data)
+    
+    def _compare_objects(self, request_data: Any, response_data: Any) -> Tuple[List[List[str]], List[str], List[str]]:
+        """
+        Compare two parsed JSON structures, returning the same data as compare_json
+        """
+        table_data = []
+        matches = []
+        differences = []
+        for leaf_name, req_display, resp_display, status in self._iter_comparison_rows(request_data, response_data):
+            if status == "✅ MATCH":
+                matches.append(leaf_name)
+            else:
+                differences.append(leaf_name)
+            table_data.append([leaf_name, req_display, resp_display, _COLORED_STATUS.get(status, status)])
+        return table_data, matches, differences
+    
+    def _iter_comparison_rows(self, request_data: Any, response_data: Any) -> Iterator[Tuple[str, str, str, str]]:
+        """
+        Compare two parsed JSON structures and yield one
+        (leaf name, request display, response display, uncolored status) row per field
+        """
+        try:
+            # Group leaf fields of both JSON structures by their leaf names
+            request_single = {}
+            request_multi = {}
+            response_single = {}
+            response_multi = {}
+            self._walk(request_data, request_single, request_multi)
+            self._walk(response_data, response_single, response_multi)
             
             # Get all unique leaf names
-            all_leaf_names = set(request_by_leaf.keys()) | set(response_by_leaf.keys())
-            
-            # Prepare table data
-            table_data = []
+            all_leaf_names = set(request_single).union(response_single)
             
             for leaf_name in sorted(all_leaf_names):
-                req_items = request_by_leaf.get(leaf_name, [])
-                resp_items = response_by_leaf.get(leaf_name, [])
+                req_first = request_single.get(leaf_name)
+                resp_first = response_single.get(leaf_name)
                 
-                if not req_items:
+                if req_first is None:
                     # Field only exists in response
-                    for resp_path, resp_value in resp_items:
+                    for resp_path, resp_value in response_multi.get(leaf_name) or (resp_first,):
                         status = "❌ MISSING IN REQUEST"
-                        self.differences.append(leaf_name)
-                        table_data.append([
-                            leaf_name,
-                            "❌ MISSING",
-                            str(resp_value)[:50] + "..." if len(str(resp_value)) > 50 else str(resp_value),
-                            self.colorize_status(status)
-                        ])
-                elif not resp_items:
+                        yield (leaf_name, "❌ MISSING", _truncate(resp_value), status)
+                elif resp_first is None:
                     # Field only exists in request
-                    for req_path, req_value in req_items:
+                    for req_path, req_value in request_multi.get(leaf_name) or (req_first,):
                         status = "❌ MISSING IN RESPONSE"
-                        self.differences.append(leaf_name)
-                        table_data.append([
-                            leaf_name,
-                            str(req_value)[:50] + "..." if len(str(req_value)) > 50 else str(req_value),
-                            "❌ MISSING",
-                            self.colorize_status(status)
-                        ])
+                        yield (leaf_name, _truncate(req_value), "❌ MISSING", status)
                 else:
                     # Compare values (take the first occurrence from each side)
-                    req_value = req_items[0][1]
-                    resp_value = resp_items[0][1]
-                    
-                    # Show all paths where this field exists
-                    req_paths = [item[0] for item in req_items]
-                    resp_paths = [item[0] for item in resp_items]
+                    req_value = req_first[1]
+                    resp_value = resp_first[1]
                     
                     if req_value == resp_value:
                         status = "✅ MATCH"
-                        self.matches.append(leaf_name)
                     else:
                         status = "🔄 DIFFERENT VALUES"
-                        self.differences.append(leaf_name)
                     
                     # Create display text showing paths if multiple
-                    req_display = str(req_value)[:50] + "..." if len(str(req_value)) > 50 else str(req_value)
-                    resp_display = str(resp_value)[:50] + "..." if len(str(resp_value)) > 50 else str(resp_value)
+                    req_display = _truncate(req_value)
+                    if (status == "✅ MATCH" and type(req_value) is type(resp_value)
+                            and type(req_value) in _PRINTED_BY_VALUE):
+                        # Equal values of these types render identically
+                        resp_display = req_display
+                    else:
+                        resp_display = _truncate(resp_value)
                     
-                    if len(req_paths) > 1:
-                        req_display += f" (found in: {', '.join(req_paths)})"
-                    if len(resp_paths) > 1:
-                        resp_display += f" (found in: {', '.join(resp_paths)})"
+                    req_items = request_multi.get(leaf_name)
+                    resp_items = response_multi.get(leaf_name)
+                    if req_items:
+                        req_display += f" (found in: {', '.join(item[0] for item in req_items)})"
+                    if resp_items:
+                        resp_display += f" (found in: {', '.join(item[0] for item in resp_items)})"
                     
-                    table_data.append([
-                        leaf_name,
-                        req_display,
-                        resp_display,
-                        self.colorize_status(status)
-                    ])
-            
-            return table_data
+                    yield (leaf_name, req_display, resp_display, status)
             
         except ValueError as e:
-            # Re-raise ValueError (from parse_json_with_line_info) as-is
+            # Re-raise ValueError (e.g. a circular reference from _walk) as-is
             raise e
         except Exception as e:
             raise ValueError(f"Unexpected error during comparison: {e}")
@@ -248,19 +419,27 @@ Original Error: {str(e)}
         """
         Generate a comprehensive comparison report
         """
-        self.differences = []
-        self.matches = []
-        
-        table_data = self.compare_json(request_json, response_json)
-        
+        return self._format_report(*self.compare_json(request_json, response_json))
+    
+    def generate_object_report(self, request_data: Any, response_data: Any) -> str:
+        """
+        Generate the comparison report for already-parsed JSON structures
+        (dicts/lists as returned by json.loads), skipping JSON parsing
+        """
+        return self._format_report(*self._compare_objects(request_data, response_data))
+    
+    def _format_report(self, table_data: List[List[str]], matches: List[str], differences: List[str]) -> str:
+        """
+        Format comparison data from compare_json into the full text report
+        """
         # Create the comparison table
         headers = ["Field Path", "Request Value", "Response Value", "Status"]
-        table = tabulate(table_data, headers=headers, tablefmt="grid", stralign="left")
+        table = _render_grid(headers, table_data)
         
         # Generate summary
         total_fields = len(table_data)
-        matches_count = len(self.matches)
-        differences_count = len(self.differences)
+        matches_count = len(matches)
+        differences_count = len(differences)
         
         report = f"""
 🔍 JSON REQUEST vs RESPONSE COMPARISON REPORT
@@ -276,21 +455,19 @@ Total Fields Compared: {total_fields}
 
 """
         
-        if self.differences:
+        if differences:
             report += f"""
 ⚠️  FIELDS WITH DIFFERENCES:
 {'-'*30}
 """
-            for diff in self.differences:
-                report += f"• {diff}\n"
+            report += "\n".join(f"• {diff}" for diff in differences) + "\n"
         
-        if self.matches:
+        if matches:
             report += f"""
 ✅ MATCHING FIELDS:
 {'-'*20}
 """
-            for match in self.matches:
-                report += f"• {match}\n"
+            report += "\n".join(f"• {match}" for match in matches) + "\n"
         
         return report
 
@@ -348,8 +525,18 @@ def compare_json_strings(request_json: str, response_json: str) -> str:
     """
     Utility function to compare JSON strings and return formatted report
     """
-    comparator = JSONComparator()
-    return comparator.generate_report(request_json, response_json)
+    return _default_comparator.generate_report(request_json, response_json)
+
+
+def compare_json_objects(request_data: Any, response_data: Any) -> str:
+    """
+    Utility function to compare already-parsed JSON structures and return formatted report
+    """
+    return _default_comparator.generate_object_report(request_data, response_data)
+
+
+# JSONComparator keeps no per-comparison state, so one instance can be shared
+_default_comparator = JSONComparator()
 
 
 if __name__ == "__main__":